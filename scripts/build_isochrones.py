@@ -0,0 +1,444 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Final
+import argparse
+import bisect
+import heapq
+import json
+import math
+import os
+import sys
+import traceback
+
+# Campus Navigation Project: FPU
+
+# build_isochrones.py: Precomputes walking-time reachability lists from every building and building entrance
+# so "what's within 5 minutes" and "nearest food/restroom" become a table lookup instead of routing at query time
+
+# Usage: python build_isochrones.py [--output FILE] [--profiles walking accessible] [--speed PROFILE=M_PER_S ...]
+#                                   [--cutoffs SECONDS ...] [--indoor-scale M_PER_UNIT] [--workers N]
+
+# The outdoor graph is built from paths.geojson, the indoor graphs are the compiled graphs written by svg_to_graph.py
+# Indoor nodes have no geographic coordinates, so each entrance is joined to a single sidewalk vertex: the one
+# nearest its [lon, lat] in the "entrances" field of its buildings.json entry if given, otherwise the vertex around
+# its building's footprint furthest towards the side in its name (north/south/east/west)
+# Joining an entrance to more than one vertex would let routes hop between sidewalks through the entrance
+
+DATA_DIR: Final[Path] = Path(__file__).resolve().parents[1] / 'public' / 'data'
+PATHS_PATH: Final[Path] = DATA_DIR / 'outdoors' / 'paths.geojson'
+BUILDINGS_PATH: Final[Path] = DATA_DIR / 'outdoors' / 'buildings.geojson'
+METADATA_PATH: Final[Path] = DATA_DIR / 'metadata' / 'buildings.json'
+INDOORS_DIR: Final[Path] = DATA_DIR / 'indoors'
+POI_PATHS: Final[dict[str, Path]] = {
+	'food': DATA_DIR / 'metadata' / 'food.json',
+	'offices': DATA_DIR / 'metadata' / 'offices.json'
+}
+OUTPUT_PATH: Final[Path] = DATA_DIR / 'metadata' / 'isochrones.json'
+
+DEFAULT_CUTOFFS: Final[tuple[int, ...]] = (60, 120, 300, 600)  # seconds
+SNAP_RADIUS: Final[float] = 0.5  # metres, path endpoints closer than this are the same vertex
+LINK_RADIUS: Final[float] = 15.0  # metres, sidewalk vertices this close to a building footprint lead into it
+INDOOR_SCALE: Final[float] = 1.0  # metres per compiled graph unit, depends on the scale of the floor plan SVGs
+METRES_PER_DEGREE_LAT: Final[float] = 110540
+METRES_PER_DEGREE_LON: Final[float] = 111320
+
+# the side of a building an entrance named e.g. ist_entrance_north_1_f1 is on, as a direction in projected metres
+COMPASS: Final[dict[str, tuple[float, float]]] = {'north': (0, 1), 'south': (0, -1), 'east': (1, 0), 'west': (-1, 0)}
+
+# node types that are only used for routing and are never worth listing as reachable
+ROUTING_TYPES: Final[frozenset[str]] = frozenset({'hall', 'rmdoor', 'path'})
+
+
+@dataclass(frozen=True)
+class Profile:
+	name: str
+	speed: float  # metres per second
+	accessible_only: bool = False
+
+
+PROFILES: Final[dict[str, Profile]] = {
+	'walking': Profile('walking', 1.4),
+	'accessible': Profile('accessible', 1.0, accessible_only=True)
+}
+
+
+@dataclass
+class GNode:
+	id: str
+	type: str
+	virtual: bool = False  # building nodes stand in for a whole footprint and can't be walked through
+
+
+@dataclass
+class CampusGraph:
+	nodes: dict[str, GNode] = field(default_factory=dict)
+	edges: dict[str, dict[str, float]] = field(default_factory=dict)  # node id -> {neighbour id: metres}
+
+	def add_node(self, node: GNode) -> None:
+		self.nodes.setdefault(node.id, node)
+		self.edges.setdefault(node.id, {})
+
+	def add_edge(self, a: str, b: str, metres: float) -> None:
+		# keep the shortest edge if two paths join the same vertices
+		if metres < self.edges[a].get(b, math.inf):
+			self.edges[a][b] = metres
+			self.edges[b][a] = metres
+
+
+def project(lon: float, lat: float) -> tuple[float, float]:
+	"""
+	Project longitude/latitude to local metres, accurate enough across a single campus.
+	"""
+	return lon * METRES_PER_DEGREE_LON * math.cos(math.radians(lat)), lat * METRES_PER_DEGREE_LAT
+
+
+def segment_distance(p: tuple[float, float], a: tuple[float, float], b: tuple[float, float]) -> float:
+	"""
+	Distance in metres from point p to the segment a-b.
+	"""
+	dx, dy = b[0] - a[0], b[1] - a[1]
+	length: float = dx * dx + dy * dy
+	t: float = 0 if length == 0 else max(0, min(1, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length))
+
+	return math.dist(p, (a[0] + t * dx, a[1] + t * dy))
+
+
+def load_outdoor_graph(graph: CampusGraph, paths_path: Path, accessible_only: bool) -> dict[str, tuple[float, float]]:
+	"""
+	Add the outdoor path network to the graph, snapping path endpoints that meet into shared vertices.
+	Returns the projected coordinates of every outdoor vertex.
+	"""
+	with open(paths_path, 'r') as f:
+		features: list[dict] = json.load(f)['features']
+
+	coords: dict[str, tuple[float, float]] = {}
+	grid: dict[tuple[int, int], list[str]] = {}
+
+	def vertex(lon: float, lat: float) -> str:
+		point: tuple[float, float] = project(lon, lat)
+		cell: tuple[int, int] = (int(point[0] // SNAP_RADIUS), int(point[1] // SNAP_RADIUS))
+
+		# reuse a vertex from this or a neighbouring grid cell if one is close enough
+		for dx in (-1, 0, 1):
+			for dy in (-1, 0, 1):
+				for other in grid.get((cell[0] + dx, cell[1] + dy), []):
+					if math.dist(point, coords[other]) <= SNAP_RADIUS: return other
+
+		node_id: str = f"out_{len(coords)}"
+		coords[node_id] = point
+		grid.setdefault(cell, []).append(node_id)
+		graph.add_node(GNode(node_id, 'path'))
+
+		return node_id
+
+	for feature in features:
+		properties: dict = feature.get('properties') or {}
+		geometry: dict = feature.get('geometry') or {}
+
+		if geometry.get('type') != 'LineString': continue
+		if accessible_only and str(properties.get('accessible')).lower() != 'true': continue
+
+		ids: list[str] = [vertex(lon, lat) for lon, lat in geometry['coordinates']]
+
+		for a, b in zip(ids, ids[1:]):
+			if a != b: graph.add_edge(a, b, math.dist(coords[a], coords[b]))
+
+	return coords
+
+
+def link_buildings(graph: CampusGraph, coords: dict[str, tuple[float, float]], buildings_path: Path) -> dict[str, dict[str, float]]:
+	"""
+	Add a virtual node for every building footprint, joined to the outdoor vertices around it.
+	Returns the outdoor vertices (and distance to them) each building is joined to.
+	"""
+	with open(buildings_path, 'r') as f:
+		features: list[dict] = json.load(f)['features']
+
+	links: dict[str, dict[str, float]] = {}
+
+	for feature in features:
+		bld_id: str = str((feature.get('properties') or {}).get('bld_id', '')).lower()
+		geometry: dict = feature.get('geometry') or {}
+		if not bld_id or geometry.get('type') != 'Polygon': continue
+
+		ring: list[tuple[float, float]] = [project(lon, lat) for lon, lat in geometry['coordinates'][0]]
+		distances: dict[str, float] = {
+			vertex: min(segment_distance(point, a, b) for a, b in zip(ring, ring[1:]))
+			for vertex, point in coords.items()
+		}
+		if not distances: continue
+
+		# fall back to the single nearest vertex for buildings with no sidewalk running up to them
+		nearby: dict[str, float] = {vertex: d for vertex, d in distances.items() if d <= LINK_RADIUS}
+		if not nearby:
+			nearest: str = min(distances, key=distances.__getitem__)
+			nearby = {nearest: distances[nearest]}
+
+		node_id: str = f"bld_{bld_id}"
+		graph.add_node(GNode(node_id, 'building', virtual=True))
+		for vertex, d in nearby.items(): graph.add_edge(node_id, vertex, d)
+
+		links[bld_id] = nearby
+
+	return links
+
+
+def load_building_ids(metadata_path: Path) -> dict[str, str]:
+	"""
+	Map the building acronyms that prefix indoor node ids (e.g. p1) to the bld_id of their footprint (e.g. p1rh).
+	"""
+	with open(metadata_path, 'r') as f:
+		buildings: dict[str, dict] = json.load(f)
+
+	return {key: str(building.get('bld_id', key)).lower() for key, building in buildings.items()}
+
+
+def load_entrance_points(metadata_path: Path) -> dict[str, tuple[float, float]]:
+	"""
+	Collect the projected position of every entrance given in the "entrances" field of buildings.json.
+	"""
+	with open(metadata_path, 'r') as f:
+		buildings: dict[str, dict] = json.load(f)
+
+	return {
+		node_id: project(lon, lat)
+		for building in buildings.values()
+		for node_id, (lon, lat) in (building.get('entrances') or {}).items()
+	}
+
+
+def attach_entrance(node_id: str, point: tuple[float, float] | None, coords: dict[str, tuple[float, float]], links: dict[str, float]) -> tuple[str, float] | None:
+	"""
+	Pick the one sidewalk vertex an entrance is joined to, and the distance to it.
+	Returns None if the entrance can't be placed.
+	"""
+	if point is not None and coords:
+		vertex: str = min(coords, key=lambda other: math.dist(point, coords[other]))
+		return vertex, math.dist(point, coords[vertex])
+
+	if not links: return None
+
+	# without a position, use the side of the building the entrance is named after
+	for word in node_id.lower().split('_'):
+		if word not in COMPASS: continue
+
+		dx, dy = COMPASS[word]
+		vertex = max(links, key=lambda other: coords[other][0] * dx + coords[other][1] * dy)
+		return vertex, links[vertex]
+
+	vertex = min(links, key=links.__getitem__)
+	return vertex, links[vertex]
+
+
+def load_indoor_graphs(graph: CampusGraph, indoors_dir: Path, metadata_path: Path, coords: dict[str, tuple[float, float]], links: dict[str, dict[str, float]], scale: float, accessible_only: bool) -> None:
+	"""
+	Add every compiled indoor graph to the graph, joining each entrance to one sidewalk vertex by its building.
+	"""
+	building_ids: dict[str, str] = load_building_ids(metadata_path)
+	entrance_points: dict[str, tuple[float, float]] = load_entrance_points(metadata_path)
+
+	for path in sorted(indoors_dir.glob('*/*.json')):
+		# the example graphs reuse real building acronyms, so keep them out of the campus graph
+		if 'example' in path.parent.name.lower(): continue
+
+		try:
+			with open(path, 'r') as f: data = json.load(f)
+		except (OSError, json.JSONDecodeError): continue
+
+		# svg_to_graph.py writes a list of nodes, older graphs wrap them in {"bld_id", "nodes"}
+		nodes: list = data.get('nodes', []) if isinstance(data, dict) else data
+		if not isinstance(nodes, list): continue
+
+		nodes = [node for node in nodes if isinstance(node, dict) and isinstance(node.get('connections'), dict)]
+		if accessible_only: nodes = [node for node in nodes if node.get('type') != 'stairs']
+
+		kept: set[str] = {str(node['node_id']) for node in nodes}
+		for node in nodes: graph.add_node(GNode(str(node['node_id']), str(node.get('type'))))
+
+		for node in nodes:
+			node_id: str = str(node['node_id'])
+
+			for other, units in node['connections'].items():
+				if other in kept: graph.add_edge(node_id, other, float(units) * scale)
+
+			if node.get('type') != 'entrance': continue
+
+			acronym: str = node_id.split('_')[0].lower()
+			attachment: tuple[str, float] | None = attach_entrance(node_id, entrance_points.get(node_id), coords, links.get(building_ids.get(acronym, acronym), {}))
+
+			if attachment: graph.add_edge(node_id, *attachment)
+			else: print(f"Warning: entrance {node_id} couldn't be joined to a sidewalk.", file=sys.stderr)
+
+
+def build_graph(profile: Profile, scale: float) -> CampusGraph:
+	"""
+	Build the combined outdoor and indoor graph for a profile.
+	"""
+	graph: CampusGraph = CampusGraph()
+
+	coords: dict[str, tuple[float, float]] = load_outdoor_graph(graph, PATHS_PATH, profile.accessible_only)
+	links: dict[str, dict[str, float]] = link_buildings(graph, coords, BUILDINGS_PATH)
+	load_indoor_graphs(graph, INDOORS_DIR, METADATA_PATH, coords, links, scale, profile.accessible_only)
+
+	return graph
+
+
+def bounded_dijkstra(graph: CampusGraph, source: str, limit: float) -> list[tuple[str, float]]:
+	"""
+	Shortest distances from source to every node within limit metres, in increasing order of distance.
+	"""
+	settled: dict[str, float] = {}
+	order: list[tuple[str, float]] = []
+	queue: list[tuple[float, str]] = [(0.0, source)]
+
+	while queue:
+		d, node_id = heapq.heappop(queue)
+		if node_id in settled: continue
+
+		settled[node_id] = d
+		order.append((node_id, d))
+
+		# virtual building nodes can be reached but not walked through
+		if graph.nodes[node_id].virtual and node_id != source: continue
+
+		for other, metres in graph.edges[node_id].items():
+			total: float = d + metres
+			if other not in settled and total <= limit: heapq.heappush(queue, (total, other))
+
+	return order
+
+
+def load_pois(paths: dict[str, Path], graph: CampusGraph) -> dict[str, dict[str, list[str]]]:
+	"""
+	Map each node to the points of interest located at it, grouped by the metadata file they come from.
+	Points of interest whose node isn't in the graph are reported and left out.
+	"""
+	pois: dict[str, dict[str, list[str]]] = {}
+	unmatched: list[str] = []
+
+	for group, path in paths.items():
+		with open(path, 'r') as f:
+			entries: dict[str, dict] = json.load(f)
+
+		for poi_id, entry in entries.items():
+			node_id: str = str(entry.get('node') or '')
+
+			if node_id in graph.nodes: pois.setdefault(node_id, {}).setdefault(group, []).append(poi_id)
+			else: unmatched.append(f"{group}/{poi_id} ({node_id or 'no node'})")
+
+	# node ids must be full graph ids such as ist_rm_1002A_f1 to be joined
+	if unmatched: print(f"Warning: {len(unmatched)} points of interest are not on a graph node: {', '.join(unmatched)}", file=sys.stderr)
+
+	return pois
+
+
+# state shared with the worker processes, set once per process by _init_worker
+_graph: CampusGraph
+_pois: dict[str, dict[str, list[str]]]
+_speed: float
+_cutoffs: list[int]
+
+
+def _init_worker(graph: CampusGraph, pois: dict[str, dict[str, list[str]]], speed: float, cutoffs: list[int]) -> None:
+	global _graph, _pois, _speed, _cutoffs
+
+	_graph, _pois, _speed, _cutoffs = graph, pois, speed, cutoffs
+
+
+def _isochrone(source: str) -> tuple[str, dict]:
+	"""
+	Build the reachability table for one source node.
+	"""
+	reachable: list[list] = []
+	nearby: dict[str, list[list]] = {group: [] for group in POI_PATHS}
+	nearest: dict[str, list] = {}
+
+	# nodes come out of the search already sorted by distance
+	for node_id, metres in bounded_dijkstra(_graph, source, _cutoffs[-1] * _speed):
+		seconds: float = round(metres / _speed, 1)
+		node_type: str = _graph.nodes[node_id].type
+
+		# points of interest at the source itself are 0 s away
+		for group, poi_ids in _pois.get(node_id, {}).items():
+			nearby[group].extend([poi_id, seconds] for poi_id in poi_ids)
+
+		if node_id == source or node_type in ROUTING_TYPES: continue
+
+		reachable.append([node_id, seconds])
+		nearest.setdefault(node_type, [node_id, seconds])
+
+	# the first n entries of reachable are within each cutoff
+	times: list[float] = [seconds for _, seconds in reachable]
+	within: dict[str, int] = {str(cutoff): bisect.bisect_right(times, cutoff) for cutoff in _cutoffs}
+
+	return source, {'reachable': reachable, 'within': within, 'nearest': nearest, **nearby}
+
+
+def build_isochrones(profile: Profile, cutoffs: list[int], scale: float, workers: int | None) -> dict:
+	"""
+	Build the reachability tables from every building and entrance for one profile.
+	"""
+	graph: CampusGraph = build_graph(profile, scale)
+	pois: dict[str, dict[str, list[str]]] = load_pois(POI_PATHS, graph)
+	sources: list[str] = [node.id for node in graph.nodes.values() if node.type in ('building', 'entrance')]
+
+	if not any(graph.nodes[source].type == 'entrance' for source in sources):
+		print("Warning: no compiled indoor graph has entrance nodes, only building footprints are used as sources.", file=sys.stderr)
+
+	with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph, pois, profile.speed, cutoffs)) as pool:
+		tables: dict[str, dict] = dict(pool.map(_isochrone, sources, chunksize=max(1, len(sources) // (4 * (workers or os.cpu_count() or 1)))))
+
+	return {
+		'speed': profile.speed,
+		'accessible_only': profile.accessible_only,
+		'sources': dict(sorted(tables.items()))
+	}
+
+
+def parse_speed(value: str) -> tuple[str, float]:
+	"""
+	Parse a --speed override of the form profile=metres_per_second, e.g. accessible=0.9.
+	"""
+	name, _, speed = value.partition('=')
+
+	if name not in PROFILES: raise argparse.ArgumentTypeError(f"unknown profile '{name}', expected one of {', '.join(sorted(PROFILES))}")
+
+	try: return name, float(speed)
+	except ValueError: raise argparse.ArgumentTypeError(f"invalid speed '{speed}' for profile '{name}'")
+
+
+# Main function to run the script
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Precompute walking-time reachability tables for campus buildings and entrances.")
+	parser.add_argument('--output', type=Path, default=OUTPUT_PATH, help="file to write the tables to")
+	parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=sorted(PROFILES), help="accessibility profiles to build")
+	parser.add_argument('--speed', type=parse_speed, nargs='+', default=[], metavar='PROFILE=M_PER_S', help="walking speed in metres per second for a profile, e.g. accessible=0.9")
+	parser.add_argument('--cutoffs', type=int, nargs='+', default=list(DEFAULT_CUTOFFS), help="time cutoffs in seconds")
+	parser.add_argument('--indoor-scale', type=float, default=INDOOR_SCALE, help="metres per compiled indoor graph unit")
+	parser.add_argument('--workers', type=int, help="number of worker processes, defaults to the number of CPUs")
+	args = parser.parse_args()
+
+	try:
+		cutoffs: list[int] = sorted(set(args.cutoffs))
+		output: dict = {'cutoffs': cutoffs, 'profiles': {}}
+		speeds: dict[str, float] = dict(args.speed)
+
+		for name in args.profiles:
+			profile: Profile = PROFILES[name]
+			if name in speeds: profile = Profile(profile.name, speeds[name], profile.accessible_only)
+
+			output['profiles'][name] = build_isochrones(profile, cutoffs, args.indoor_scale, args.workers)
+			print(f"Built {len(output['profiles'][name]['sources'])} reachability tables for the {name} profile.")
+
+		with open(args.output, 'w') as f:
+			json.dump(output, f, separators=(',', ':'))
+		print(f"Saved reachability tables to {args.output}.")
+
+	except Exception as e:
+		print(f"Error: {e}", file=sys.stderr)
+		traceback.print_exc()
+		sys.exit(1)
+
+
+if __name__ == '__main__': main()
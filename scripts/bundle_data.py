@@ -0,0 +1,225 @@
+from pathlib import Path
+from typing import Final
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import traceback
+
+# brotli is optional, without it only the gzip variants are written
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+# Campus Navigation Project: FPU
+
+# bundle_data.py: Packages public/data for long-term browser caching
+# Every file is copied under a content-hashed name with .br and .gz precompressed variants next to it, and
+# manifest.json maps each logical name (e.g. "outdoors/paths.geojson") to its hashed file
+# Optionally writes one bundle per building with its compiled graph, floor SVGs and metadata so a cold indoor
+# view is a single request
+
+# Usage: python bundle_data.py [--source DIR] [--output DIR] [--no-bundles] [--no-precompressed]
+# Run after "npm run build", the default output is dist/data next to the unhashed files Vite copies over
+# Install brotli (pinned in requirements.txt) to also write the .br variants
+
+# Serving: the precompressed variants and long-term caching only pay off on a host that serves a .br/.gz sibling
+# with a Content-Encoding header (e.g. nginx brotli_static/gzip_static) and sends hashed files with
+# "Cache-Control: public, max-age=31536000, immutable" and manifest.json with a short lifetime
+# GitHub Pages does neither, so the deploy workflow runs with --no-precompressed and only gains the manifest
+# and the per-building bundles, which cut a cold indoor view to one request once the app reads the manifest
+
+ROOT_DIR: Final[Path] = Path(__file__).resolve().parents[1]
+SOURCE_DIR: Final[Path] = ROOT_DIR / 'public' / 'data'
+OUTPUT_DIR: Final[Path] = ROOT_DIR / 'dist' / 'data'
+MANIFEST_NAME: Final[str] = 'manifest.json'
+
+HASH_LENGTH: Final[int] = 10
+COMPRESSIBLE_SUFFIXES: Final[frozenset[str]] = frozenset({'.json', '.geojson', '.svg'})
+
+# source art for the floor plans, not used by the app
+EXCLUDED_DIRS: Final[frozenset[str]] = frozenset({'base files'})
+
+
+def is_excluded(relative_dir: Path) -> bool:
+	"""
+	Whether a directory, relative to the source directory, isn't shipped: example data or source art.
+	"""
+	return any('example' in part.lower() or part.lower() in EXCLUDED_DIRS for part in relative_dir.parts)
+
+
+def hashed_name(logical_name: str, content: bytes) -> str:
+	"""
+	Insert a hash of the content before the file extension, e.g. outdoors/paths.3f2a1b9c0d.geojson.
+	"""
+	digest: str = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+	path: Path = Path(logical_name)
+
+	return (path.parent / f"{path.stem}.{digest}{path.suffix}").as_posix()
+
+
+def write_asset(output_dir: Path, logical_name: str, content: bytes, precompressed: bool = True) -> dict:
+	"""
+	Write a content-hashed copy of an asset and its precompressed variants.
+	Returns the manifest entry for the asset.
+	"""
+	name: str = hashed_name(logical_name, content)
+	target: Path = output_dir / name
+	entry: dict = {'file': name, 'size': len(content), 'encodings': []}
+
+	# a file with the same hash was written by an earlier run and is identical
+	target.parent.mkdir(parents=True, exist_ok=True)
+	if not target.exists(): target.write_bytes(content)
+
+	if not precompressed or Path(logical_name).suffix not in COMPRESSIBLE_SUFFIXES: return entry
+
+	variants: dict[str, bytes] = {}
+	variants['gz'] = gzip.compress(content, compresslevel=9, mtime=0)
+	if brotli is not None: variants['br'] = brotli.compress(content, quality=11)
+
+	for encoding, compressed in sorted(variants.items()):
+		# small files can grow when compressed, serve those as is
+		if len(compressed) >= len(content): continue
+
+		variant: Path = target.with_name(f"{target.name}.{encoding}")
+		if not variant.exists(): variant.write_bytes(compressed)
+
+		entry['encodings'].append(encoding)
+
+	return entry
+
+
+def rewrite_index(content: bytes, assets: dict[str, dict], directory: str) -> bytes:
+	"""
+	Point the layer files listed in an outdoor index.json at their hashed names.
+	"""
+	index: dict = json.loads(content)
+
+	for layer in index.get('layers', []):
+		entry: dict | None = assets.get(f"{directory}/{layer.get('file')}")
+		if entry: layer['file'] = Path(entry['file']).name
+
+	return json.dumps(index, separators=(',', ':')).encode()
+
+
+def load_compiled_graph(path: Path) -> list | None:
+	"""
+	Load a graph written by svg_to_graph.py, a non-empty list of {node_id, connections} with connection distances.
+	Returns None for anything else, e.g. connection lists, node dumps or empty stubs.
+	"""
+	try: data = json.loads(path.read_text(encoding='utf-8'))
+	except json.JSONDecodeError: return None
+
+	if not isinstance(data, list) or not data: return None
+	if not all(isinstance(node, dict) and 'node_id' in node and isinstance(node.get('connections'), dict) for node in data): return None
+
+	return data
+
+
+def bundle_id(building_dir: Path, buildings: dict[str, dict]) -> str:
+	"""
+	The bld_id a building directory is bundled under, the map id from buildings.json (e.g. P1 -> p1rh).
+	"""
+	key: str = building_dir.name.lower()
+
+	return str(buildings.get(key, {}).get('bld_id', key)).lower()
+
+
+def build_bundle(building_dir: Path, bld_id: str, metadata: dict | None) -> bytes | None:
+	"""
+	Combine a building's compiled graph, floor SVGs and metadata into one JSON document.
+	Returns None if the building has nothing to bundle.
+	"""
+	graphs: list[list] = []
+	floors: dict[str, str] = {}
+
+	for path in sorted(building_dir.iterdir()):
+		if not path.is_file(): continue
+
+		if path.suffix == '.svg': floors[path.stem] = path.read_text(encoding='utf-8')
+		elif path.suffix == '.json':
+			graph: list | None = load_compiled_graph(path)
+			if graph is not None: graphs.append(graph)
+
+	if len(graphs) > 1: print(f"Warning: {building_dir.name} has {len(graphs)} compiled graphs, bundling the first.", file=sys.stderr)
+	if not graphs and not floors: return None
+
+	bundle: dict = {'bld_id': bld_id, 'floors': floors, 'metadata': metadata}
+	if graphs: bundle['graph'] = graphs[0]
+
+	return json.dumps(bundle, separators=(',', ':')).encode()
+
+
+def package(source_dir: Path, output_dir: Path, bundles: bool, precompressed: bool = True) -> dict:
+	"""
+	Write the hashed assets, compressed variants, building bundles and manifest.
+	Returns the manifest.
+	"""
+	assets: dict[str, dict] = {}
+	indexes: list[Path] = []
+
+	for path in sorted(source_dir.rglob('*')):
+		if not path.is_file() or is_excluded(path.parent.relative_to(source_dir)): continue
+
+		# index files reference other assets by name, so they are written once those have been hashed
+		if path.name == 'index.json':
+			indexes.append(path)
+			continue
+
+		logical_name: str = path.relative_to(source_dir).as_posix()
+		assets[logical_name] = write_asset(output_dir, logical_name, path.read_bytes(), precompressed)
+
+	for path in indexes:
+		logical_name: str = path.relative_to(source_dir).as_posix()
+		content: bytes = rewrite_index(path.read_bytes(), assets, path.parent.relative_to(source_dir).as_posix())
+		assets[logical_name] = write_asset(output_dir, logical_name, content, precompressed)
+
+	manifest: dict = {'assets': dict(sorted(assets.items())), 'bundles': {}}
+
+	if bundles:
+		with open(source_dir / 'metadata' / 'buildings.json', 'r') as f:
+			buildings: dict[str, dict] = json.load(f)
+
+		for building_dir in sorted((source_dir / 'indoors').iterdir()):
+			# the example data isn't a real building
+			if not building_dir.is_dir() or is_excluded(building_dir.relative_to(source_dir)): continue
+
+			# bundles are keyed by the same bld_id as resolved events and isochrone sources
+			bld_id: str = bundle_id(building_dir, buildings)
+			bundle: bytes | None = build_bundle(building_dir, bld_id, buildings.get(building_dir.name.lower()))
+			if bundle is None: continue
+
+			manifest['bundles'][bld_id] = write_asset(output_dir, f"bundles/{bld_id}.json", bundle, precompressed)
+
+	# the manifest keeps a fixed name so the app can always find it, it should be served with a short cache lifetime
+	output_dir.mkdir(parents=True, exist_ok=True)
+	with open(output_dir / MANIFEST_NAME, 'w') as f:
+		json.dump(manifest, f, indent=2)
+
+	return manifest
+
+
+# Main function to run the script
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Write content-hashed, precompressed copies of the static data with a manifest.")
+	parser.add_argument('--source', type=Path, default=SOURCE_DIR, help="directory of static data to package")
+	parser.add_argument('--output', type=Path, default=OUTPUT_DIR, help="directory to write the packaged data to")
+	parser.add_argument('--no-bundles', action='store_true', help="don't write the per-building bundles")
+	parser.add_argument('--no-precompressed', action='store_true', help="don't write the .br/.gz variants, for hosts that can't serve them")
+	args = parser.parse_args()
+
+	try:
+		if brotli is None and not args.no_precompressed: print("brotli is not installed, only writing gzip variants.")
+
+		manifest: dict = package(args.source, args.output, not args.no_bundles, not args.no_precompressed)
+		print(f"Packaged {len(manifest['assets'])} assets and {len(manifest['bundles'])} building bundles into {args.output}.")
+
+	except Exception as e:
+		print(f"Error: {e}", file=sys.stderr)
+		traceback.print_exc()
+		sys.exit(1)
+
+
+if __name__ == '__main__': main()
@@ -0,0 +1,332 @@
+import difflib
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Final
+
+# Campus Navigation Project: FPU
+
+# resolve_locations.py: Maps the free-text location of a scraped event (e.g. "IST 1002A") to the building's map id
+# (the bld_id in outdoors/buildings.geojson) and a destination node id from the compiled indoor graphs
+
+# Exact building and room lookups go through a precomputed index, fuzzy building matches are only attempted
+# on a miss and are memoised in a JSON cache file so they are not recomputed on the next run
+# The cache is tied to a fingerprint of the building aliases and is thrown away when buildings.json changes
+
+DATA_DIR: Final[Path] = Path(__file__).resolve().parents[2] / 'public' / 'data'
+BUILDINGS_PATH: Final[Path] = DATA_DIR / 'metadata' / 'buildings.json'
+INDOORS_DIR: Final[Path] = DATA_DIR / 'indoors'
+CACHE_PATH: Final[Path] = Path(__file__).resolve().parent / '.location_cache.json'
+
+FUZZY_CUTOFF: Final[float] = 0.8
+FUZZY_MEMO_CUTOFF: Final[float] = 0.9  # fuzzy matches weaker than this are used but not memoised
+
+# words that carry no information about where the event is
+FILLER_WORDS: Final[frozenset[str]] = frozenset({'ROOM', 'RM', 'BLDG', 'BUILDING', 'THE', 'AND', 'HALL', 'FLOOR', 'CENTER'})
+
+# building names spell numbers as roman numerals ("Phase III") but events usually don't ("Phase 3")
+ROMAN_NUMERALS: Final[dict[str, str]] = {'I': '1', 'II': '2', 'III': '3', 'IV': '4', 'V': '5'}
+
+_ROOM_PATTERN: Final[re.Pattern[str]] = re.compile(r'^\d{3,4}[A-Z]?$')
+_SHORT_ROOM_PATTERN: Final[re.Pattern[str]] = re.compile(r'^\d{1,2}[A-Z]?$')
+_JOINED_PATTERN: Final[re.Pattern[str]] = re.compile(r'^([A-Z]+\d??)(\d{3,4}[A-Z]?)$')
+
+
+@dataclass
+class LocationIndex:
+	buildings: dict[str, str] = field(default_factory=dict)  # normalised alias -> bld_id
+	rooms: dict[tuple[str, str], str] = field(default_factory=dict)  # (bld_id, room number) -> node id
+
+
+def normalise_location(location: str) -> str:
+	"""Normalises a location string for lookups
+
+	Args:
+		location (str): The raw location string, e.g. "IST-1002a" or "Room 1002A, IST Building"
+
+	Returns:
+		str: The location in upper case with punctuation and filler words removed and roman numerals
+			replaced by digits, e.g. "IST 1002A"
+	"""
+
+	words: list[str] = re.sub(r'[^A-Z0-9]+', ' ', location.upper()).split()
+
+	return ' '.join(ROMAN_NUMERALS.get(word, word) for word in words if word not in FILLER_WORDS)
+
+
+def _split_location(location: str, index: LocationIndex) -> tuple[str, str | None, int | None]:
+	"""Splits a normalised location into its building text and room number
+
+	Args:
+		location (str): A location as returned by normalise_location
+		index (LocationIndex): The lookup index, used to recognise building aliases
+
+	Returns:
+		tuple[str, str | None, int | None]: The building text, the room number if one was found, and the number of
+			building words that came before the room
+	"""
+
+	words: list[str] = location.split()
+	room: str | None = None
+	room_at: int | None = None
+	building: list[str] = []
+
+	for i, word in enumerate(words):
+		# "IST1002A" has the building and room joined together
+		joined: re.Match[str] | None = _JOINED_PATTERN.match(word)
+
+		# a short number is only a room when it follows a building, otherwise it's part of a name like "Phase 3"
+		follows_building: bool = i > 0 and words[i - 1] in index.buildings
+
+		if room is None and (_ROOM_PATTERN.match(word) or (follows_building and _SHORT_ROOM_PATTERN.match(word))):
+			room, room_at = word, len(building)
+		elif room is None and joined:
+			building.append(joined.group(1))
+			room, room_at = joined.group(2), len(building)
+		else: building.append(word)
+
+	return ' '.join(building), room, room_at
+
+
+def _load_graph_nodes(path: Path) -> list[dict]:
+	"""Loads the nodes of a compiled graph, skipping files that are not compiled graphs
+
+	Args:
+		path (Path): The path to a JSON file in the indoors directory
+
+	Returns:
+		list[dict]: The nodes of the graph, empty if the file is not a compiled graph
+	"""
+
+	try:
+		with open(path, 'r') as f: data = json.load(f)
+	except (OSError, json.JSONDecodeError): return []
+
+	# svg_to_graph.py writes a list of nodes, older graphs wrap them in {"bld_id", "nodes"}
+	if isinstance(data, dict): data = data.get('nodes', [])
+	if not isinstance(data, list): return []
+
+	return [node for node in data if isinstance(node, dict)]
+
+
+def build_index(buildings_path: Path = BUILDINGS_PATH, indoors_dir: Path = INDOORS_DIR) -> LocationIndex:
+	"""Builds the lookup index of building aliases and room nodes
+
+	Args:
+		buildings_path (Path): The path to buildings.json
+		indoors_dir (Path): The directory containing the compiled indoor graphs
+
+	Returns:
+		LocationIndex: The index used by resolve_location
+	"""
+
+	index: LocationIndex = LocationIndex()
+
+	with open(buildings_path, 'r') as f:
+		buildings: dict[str, dict] = json.load(f)
+
+	# a building can be referred to by its key, map id, abbreviation, or full name
+	# events resolve to the map id (the bld_id in outdoors/buildings.geojson) so they can be joined to a footprint
+	for key, building in buildings.items():
+		bld_id: str = building.get('bld_id', key)
+
+		for alias in (key, bld_id, building.get('abbreviation', ''), building.get('name', '')):
+			alias = normalise_location(alias)
+			if alias: index.buildings.setdefault(alias, bld_id)
+
+	for path in sorted(indoors_dir.glob('*/*.json')):
+		# the example graphs reuse real building acronyms, so keep them out of the index
+		if 'example' in path.parent.name.lower(): continue
+
+		for node in _load_graph_nodes(path):
+			node_id: str = str(node.get('node_id', node.get('id', '')))
+			parts: list[str] = node_id.split('_')
+
+			# only rooms follow the <bld>_rm_<number>_f<floor> naming convention
+			if len(parts) < 4 or parts[1] != 'rm': continue
+
+			# node ids are prefixed with the building acronym, which may differ from its map id (p1 -> p1rh)
+			bld_id = index.buildings.get(parts[0].upper(), parts[0].lower())
+			index.rooms.setdefault((bld_id, parts[2].upper()), node_id)
+
+	return index
+
+
+def index_fingerprint(index: LocationIndex) -> str:
+	"""Fingerprints the building aliases of an index, so memoised matches can be dropped when they change
+
+	Args:
+		index (LocationIndex): The lookup index
+
+	Returns:
+		str: A short hash of the alias to bld_id mapping
+	"""
+
+	return hashlib.sha256(json.dumps(index.buildings, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def load_cache(fingerprint: str, cache_path: Path = CACHE_PATH) -> dict[str, str | None]:
+	"""Loads the memoised fuzzy building matches from previous runs
+
+	Args:
+		fingerprint (str): The fingerprint of the current index, see index_fingerprint
+		cache_path (Path): The path to the cache file
+
+	Returns:
+		dict[str, str | None]: Normalised building text mapped to its bld_id, or None if nothing matched,
+			empty if the cache was made with different building aliases
+	"""
+
+	try:
+		with open(cache_path, 'r') as f: data = json.load(f)
+	except (OSError, json.JSONDecodeError): return {}
+
+	# a building or alias added since may now match a location that missed or matched poorly before
+	if not isinstance(data, dict) or data.get('fingerprint') != fingerprint: return {}
+
+	return dict(data.get('matches', {}))
+
+
+def save_cache(cache: dict[str, str | None], fingerprint: str, cache_path: Path = CACHE_PATH) -> None:
+	"""Saves the memoised fuzzy building matches for the next run
+
+	Args:
+		cache (dict[str, str | None]): The cache to save
+		fingerprint (str): The fingerprint of the index the matches were made with
+		cache_path (Path): The path to the cache file
+	"""
+
+	with open(cache_path, 'w') as f: json.dump({'fingerprint': fingerprint, 'matches': cache}, f, indent=2, sort_keys=True)
+
+
+def _find_alias(words: list[str], index: LocationIndex, start: int | None = None, end: int | None = None) -> str | None:
+	"""Finds the longest building alias among the words, optionally one starting or ending at a given word
+
+	Args:
+		words (list[str]): The building words
+		index (LocationIndex): The lookup index
+		start (int | None): Only consider aliases starting at this word
+		end (int | None): Only consider aliases ending just before this word
+
+	Returns:
+		str | None: The bld_id of the rightmost, then longest, matching alias
+	"""
+
+	ends: range = range(end, end + 1) if end is not None else range(len(words), 0, -1)
+
+	for stop in ends:
+		starts: range = range(start, start + 1) if start is not None else range(stop)
+
+		for begin in starts:
+			if begin >= stop: continue
+
+			bld_id: str | None = index.buildings.get(' '.join(words[begin:stop]))
+			if bld_id: return bld_id
+
+	return None
+
+
+def _resolve_building(building: str, index: LocationIndex, cache: dict[str, str | None], room_at: int | None = None) -> str | None:
+	"""Resolves the building text of a location to a bld_id
+
+	Args:
+		building (str): The normalised building text
+		index (LocationIndex): The lookup index
+		cache (dict[str, str | None]): The memoised fuzzy matches, updated in place
+		room_at (int | None): The number of building words before the room number, None if there is no room
+
+	Returns:
+		str | None: The bld_id, or None if no building matched
+	"""
+
+	if not building: return None
+
+	bld_id: str | None = index.buildings.get(building)
+	if bld_id: return bld_id
+
+	# the building may come with extra words around it, e.g. "WEB DEVELOPMENT CLUB IST" or "IST ATRIUM"
+	# the room belongs to the building named right before it ("IST 1002A / BARC"), or right after it ("1002A IST"),
+	# otherwise the building is usually named last
+	words: list[str] = building.split()
+	if room_at is not None:
+		bld_id = _find_alias(words, index, end=room_at) or _find_alias(words, index, start=room_at)
+		if bld_id: return bld_id
+
+	bld_id = _find_alias(words, index)
+	if bld_id: return bld_id
+
+	if building in cache: return cache[building]
+
+	matches: list[str] = difflib.get_close_matches(building, index.buildings.keys(), n=1, cutoff=FUZZY_CUTOFF)
+	if not matches:
+		cache[building] = None
+		return None
+
+	bld_id = index.buildings[matches[0]]
+
+	# a match close to the cutoff may be wrong, so don't let it stick across runs
+	if difflib.SequenceMatcher(None, building, matches[0]).ratio() >= FUZZY_MEMO_CUTOFF: cache[building] = bld_id
+
+	return bld_id
+
+
+def resolve_location(location: str, index: LocationIndex, cache: dict[str, str | None]) -> tuple[str | None, str | None]:
+	"""Resolves a free-text event location to a building and a destination node
+
+	Args:
+		location (str): The raw location string
+		index (LocationIndex): The lookup index
+		cache (dict[str, str | None]): The memoised fuzzy matches, updated in place
+
+	Returns:
+		tuple[str | None, str | None]: The bld_id and node id, either may be None if it could not be resolved
+	"""
+
+	location = normalise_location(location)
+
+	# the whole location may just be a building, e.g. "Phase 3"
+	bld_id: str | None = index.buildings.get(location)
+	if bld_id: return bld_id, None
+
+	building, room, room_at = _split_location(location, index)
+
+	bld_id = _resolve_building(building, index, cache, room_at)
+	if not bld_id or not room: return bld_id, None
+
+	return bld_id, index.rooms.get((bld_id, room))
+
+
+def resolve_events(events: list[dict], index: LocationIndex | None = None, cache_path: Path = CACHE_PATH) -> list[dict]:
+	"""Adds the bld_id and node fields to each event based on its location
+
+	Args:
+		events (list[dict]): The events as built by getEvents
+		index (LocationIndex | None): The lookup index, built from the data directory if not given
+		cache_path (Path): The path to the fuzzy match cache file
+
+	Returns:
+		list[dict]: The same events with bld_id and node set
+	"""
+
+	if index is None: index = build_index()
+
+	fingerprint: str = index_fingerprint(index)
+	loaded: dict[str, str | None] = load_cache(fingerprint, cache_path)
+	cache: dict[str, str | None] = dict(loaded)
+
+	# many events share a location, so only resolve each distinct string once
+	resolved: dict[str, tuple[str | None, str | None]] = {}
+
+	for event in events:
+		location: str = str(event.get('location') or '')
+
+		if location not in resolved: resolved[location] = resolve_location(location, index, cache)
+
+		event['bld_id'], event['node'] = resolved[location]
+
+	# only touch the cache file when a new fuzzy match was made or the old cache was thrown away
+	if cache != loaded or not loaded: save_cache(cache, fingerprint, cache_path)
+
+	return events
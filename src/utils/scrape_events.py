@@ -2,6 +2,7 @@ import ast
 import requests
 import json
 from bs4 import BeautifulSoup
+from resolve_locations import LocationIndex, build_index, resolve_events
 
 CAMPUS_INFO_URL: str = 'https://api.presence.io/floridapoly/v1/app/campus'
 EVENTS_URL: str = 'https://api.presence.io/floridapoly/v1/events'
@@ -13,14 +14,17 @@ _have_campus_info: bool = False
 _api_id: str
 _cdn: str
 _portal_link: str
+_location_index: LocationIndex | None = None
 
 def getEvents() -> str:
 	"""Fetchs all campus events from Involve web server
 
 	Returns:
-		str: A JSON object containing all campus events
+		str: A JSON object containing all campus events, each with the bld_id and node its location resolves to
 	"""
 
+	global _location_index
+
 	# fetch the campus info if we don't already have it
 	if not _have_campus_info: _getCampusInfo()
 	if not _have_campus_info: return r'{}'
@@ -35,7 +39,7 @@ def getEvents() -> str:
 
 	# iterate over each event
 	events: list[str] = str(soup).split('{"apiId":')[1:]
-	events_list: list[dict[str, str | list[str]]] = []
+	events_list: list[dict[str, str | list[str] | None]] = []
 
 	for event in events:
 		# don't capture the event if it is already over
@@ -66,7 +70,7 @@ def getEvents() -> str:
 		if has_contact_email: contact_email = str(_capture_content(event, "contactEmail", "hasCoverImage"))
 		if has_rsvp_link: rsvp_link = str(_capture_content(event, "rsvpLink", "rsvpStatus"))
 
-		event_dict: dict[str, str | list[str]] = {
+		event_dict: dict[str, str | list[str] | None] = {
 			"url": _portal_link + 'event/' + uri,
 			"name": name,
 			"org": org,
@@ -85,6 +89,10 @@ def getEvents() -> str:
 
 		events_list.append(event_dict)
 
+	# link each event location to a building and a routable destination node
+	if _location_index is None: _location_index = build_index()
+	resolve_events(events_list, _location_index)
+
 	# convert the Python dictionary to a JSON string
 	json_obj: str = json.dumps(events_list)
 
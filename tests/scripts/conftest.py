@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the build scripts are run directly rather than installed, so make scripts/ importable the same way
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
@@ -0,0 +1,190 @@
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+import build_isochrones as iso
+from build_isochrones import CampusGraph, GNode
+
+LAT: float = 28.15
+
+
+def lonlat(x: float, y: float) -> list[float]:
+	"""Inverse of build_isochrones.project for points in metres near the campus"""
+
+	lat: float = LAT + y / iso.METRES_PER_DEGREE_LAT
+	return [x / (iso.METRES_PER_DEGREE_LON * math.cos(math.radians(lat))), lat]
+
+
+def at(x: float, y: float) -> tuple[float, float]:
+	"""Projected position of a point given in metres, as stored in the outdoor coordinates"""
+
+	return iso.project(*lonlat(x, y))
+
+
+def line(points: list[tuple[float, float]], accessible: str = 'true') -> dict:
+	return {
+		'type': 'Feature',
+		'properties': {'type': 'sidewalk', 'accessible': accessible},
+		'geometry': {'type': 'LineString', 'coordinates': [lonlat(x, y) for x, y in points]}
+	}
+
+
+def write_json(path: Path, data: object) -> Path:
+	path.parent.mkdir(parents=True, exist_ok=True)
+	path.write_text(json.dumps(data))
+	return path
+
+
+def chain(*ids: str, metres: float = 10) -> CampusGraph:
+	"""A graph of nodes joined one after another"""
+
+	graph: CampusGraph = CampusGraph()
+	for node_id in ids: graph.add_node(GNode(node_id, 'rm'))
+	for a, b in zip(ids, ids[1:]): graph.add_edge(a, b, metres)
+
+	return graph
+
+
+@pytest.fixture
+def campus(tmp_path: Path) -> dict[str, Path]:
+	"""A 20 m square building with a U-shaped sidewalk 5 m around its west, south and east sides"""
+
+	u: list[tuple[float, float]] = (
+		[(-5, y) for y in range(25, -5, -5)] + [(x, -5) for x in range(0, 25, 5)] + [(25, y) for y in range(-5, 30, 5)]
+	)
+	square: list[list[float]] = [lonlat(x, y) for x, y in [(0, 0), (20, 0), (20, 20), (0, 20), (0, 0)]]
+
+	return {
+		'paths': write_json(tmp_path / 'paths.geojson', {'type': 'FeatureCollection', 'features': [line(u)]}),
+		'buildings': write_json(tmp_path / 'buildings.geojson', {'type': 'FeatureCollection', 'features': [{
+			'type': 'Feature',
+			'properties': {'bld_id': 'tst', 'bld_name': 'Test Building'},
+			'geometry': {'type': 'Polygon', 'coordinates': [square]}
+		}]}),
+		'metadata': write_json(tmp_path / 'buildings.json', {'t': {'name': 'Test Building', 'abbreviation': 'T', 'bld_id': 'tst'}}),
+		'indoors': tmp_path / 'indoors'
+	}
+
+
+def build(campus: dict[str, Path], accessible_only: bool = False) -> tuple[CampusGraph, dict[str, tuple[float, float]]]:
+	graph: CampusGraph = CampusGraph()
+	coords: dict[str, tuple[float, float]] = iso.load_outdoor_graph(graph, campus['paths'], accessible_only)
+	links: dict[str, dict[str, float]] = iso.link_buildings(graph, coords, campus['buildings'])
+	iso.load_indoor_graphs(graph, campus['indoors'], campus['metadata'], coords, links, 1.0, accessible_only)
+
+	return graph, coords
+
+
+def outdoor_distances(graph: CampusGraph, coords: dict[str, tuple[float, float]]) -> dict[tuple[str, str], float]:
+	return {
+		(source, node_id): d
+		for source in coords
+		for node_id, d in iso.bounded_dijkstra(graph, source, math.inf)
+		if node_id in coords
+	}
+
+
+def test_bounded_dijkstra_order_and_limit() -> None:
+	graph: CampusGraph = chain('a', 'b', 'c', 'd')
+	graph.add_node(GNode('e', 'rm'))
+	graph.add_edge('a', 'e', 5)
+
+	assert iso.bounded_dijkstra(graph, 'a', 20) == [('a', 0), ('e', 5), ('b', 10), ('c', 20)]
+
+
+def test_virtual_nodes_are_not_walked_through() -> None:
+	graph: CampusGraph = chain('a', 'c', metres=100)
+	graph.add_node(GNode('bld_x', 'building', virtual=True))
+	graph.add_edge('a', 'bld_x', 1)
+	graph.add_edge('bld_x', 'c', 1)
+
+	assert dict(iso.bounded_dijkstra(graph, 'a', math.inf)) == {'a': 0, 'bld_x': 1, 'c': 100}
+
+	# a virtual node can still be a source
+	assert dict(iso.bounded_dijkstra(graph, 'bld_x', math.inf))['c'] == 1
+
+
+def test_outdoor_vertices_snap(tmp_path: Path) -> None:
+	paths: Path = write_json(tmp_path / 'paths.geojson', {'type': 'FeatureCollection', 'features': [
+		line([(0, 0), (10, 0)]),
+		line([(10.2, 0), (20, 0)]),  # meets the first path
+		line([(20.8, 0), (30, 0)])  # stops short of the second path
+	]})
+	graph: CampusGraph = CampusGraph()
+	coords: dict[str, tuple[float, float]] = iso.load_outdoor_graph(graph, paths, False)
+
+	assert len(coords) == 5
+	assert sorted(round(d) for _, d in iso.bounded_dijkstra(graph, 'out_0', math.inf)) == [0, 10, 20]
+
+
+def test_accessible_profile_drops_paths_and_stairs(tmp_path: Path, campus: dict[str, Path]) -> None:
+	paths: Path = write_json(tmp_path / 'paths.geojson', {'type': 'FeatureCollection', 'features': [
+		line([(0, 0), (10, 0)]),
+		line([(10, 0), (20, 0)], accessible='false')
+	]})
+	write_json(campus['indoors'] / 'T' / 'graph.json', [
+		{'node_id': 't_hall_n-s_a_1_f1', 'connections': {'t_stairs_north_1_f1': 3}, 'type': 'hall', 'role': 'routing'},
+		{'node_id': 't_stairs_north_1_f1', 'connections': {'t_hall_n-s_a_1_f1': 3}, 'type': 'stairs', 'role': 'routing'}
+	])
+	campus['paths'] = paths
+
+	walking, walking_coords = build(campus)
+	accessible, accessible_coords = build(campus, accessible_only=True)
+
+	assert len(walking_coords) == 3
+	assert len(accessible_coords) == 2
+	assert 't_stairs_north_1_f1' in walking.nodes
+	assert 't_stairs_north_1_f1' not in accessible.nodes
+
+
+def test_entrance_does_not_shorten_outdoor_routes(campus: dict[str, Path]) -> None:
+	graph, coords = build(campus)
+	before: dict[tuple[str, str], float] = outdoor_distances(graph, coords)
+
+	write_json(campus['indoors'] / 'T' / 'graph.json', [
+		{'node_id': 't_entrance_north_1_f1', 'connections': {}, 'type': 'entrance', 'role': 'routing'}
+	])
+	graph, coords = build(campus)
+
+	assert len(graph.edges['t_entrance_north_1_f1']) == 1
+	assert outdoor_distances(graph, coords) == pytest.approx(before)
+
+
+def test_entrance_attachment(campus: dict[str, Path]) -> None:
+	write_json(campus['indoors'] / 'T' / 'graph.json', [
+		{'node_id': 't_entrance_south_1_f1', 'connections': {}, 'type': 'entrance', 'role': 'routing'},
+		{'node_id': 't_entrance_west_1_f1', 'connections': {}, 'type': 'entrance', 'role': 'routing'}
+	])
+	metadata: dict = json.loads(campus['metadata'].read_text())
+	metadata['t']['entrances'] = {'t_entrance_west_1_f1': lonlat(-1, 12)}
+	write_json(campus['metadata'], metadata)
+
+	graph, coords = build(campus)
+	(south, _), = graph.edges['t_entrance_south_1_f1'].items()
+	(west, metres), = graph.edges['t_entrance_west_1_f1'].items()
+
+	# named after the south side, so joined to the southern sidewalk
+	assert coords[south][1] == pytest.approx(at(0, -5)[1], abs=0.01)
+
+	# placed explicitly, so joined to the nearest vertex
+	assert coords[west] == pytest.approx(at(-5, 10), abs=0.01)
+	assert metres == pytest.approx(math.dist((-1, 12), (-5, 10)), abs=0.01)
+
+
+def test_isochrone_table() -> None:
+	graph: CampusGraph = chain('src', 'h', 'a', 'b')
+	graph.nodes['h'].type = 'hall'
+	graph.nodes['src'].type = 'entrance'
+	pois: dict[str, dict[str, list[str]]] = {'src': {'food': ['cafe']}, 'h': {'offices': ['registrar']}}
+
+	iso._init_worker(graph, pois, 1.0, [10, 20, 25, 60])
+	source, table = iso._isochrone('src')
+
+	assert source == 'src'
+	assert table['reachable'] == [['a', 20.0], ['b', 30.0]]
+	assert table['within'] == {'10': 0, '20': 1, '25': 1, '60': 2}
+	assert table['nearest'] == {'rm': ['a', 20.0]}
+	assert table['food'] == [['cafe', 0.0]]
+	assert table['offices'] == [['registrar', 10.0]]
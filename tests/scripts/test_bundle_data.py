@@ -0,0 +1,85 @@
+import gzip
+import json
+from pathlib import Path
+
+import bundle_data as bd
+
+DATA_DIR: Path = Path(__file__).resolve().parents[2] / 'public' / 'data'
+
+
+def test_hashed_name_is_stable_and_follows_content() -> None:
+	name: str = bd.hashed_name('outdoors/paths.geojson', b'{}')
+
+	assert name == bd.hashed_name('outdoors/paths.geojson', b'{}')
+	assert name != bd.hashed_name('outdoors/paths.geojson', b'[]')
+	assert name.startswith('outdoors/paths.') and name.endswith('.geojson')
+	assert len(Path(name).suffixes[0]) == bd.HASH_LENGTH + 1
+
+
+def test_rewrite_index_points_at_hashed_siblings() -> None:
+	index: bytes = json.dumps({'layers': [
+		{'id': 'paths', 'file': 'paths.geojson'},
+		{'id': 'lakes', 'file': 'lakes.geojson'}
+	]}).encode()
+	assets: dict[str, dict] = {'outdoors/paths.geojson': {'file': 'outdoors/paths.0123456789.geojson'}}
+
+	layers: list[dict] = json.loads(bd.rewrite_index(index, assets, 'outdoors'))['layers']
+
+	assert layers[0]['file'] == 'paths.0123456789.geojson'
+	assert layers[1]['file'] == 'lakes.geojson'
+
+
+def test_load_compiled_graph() -> None:
+	assert bd.load_compiled_graph(DATA_DIR / 'indoors' / 'example' / 'example.json') is not None
+
+	# the empty IST stub, a connections list and a node dump that isn't valid JSON
+	assert bd.load_compiled_graph(DATA_DIR / 'indoors' / 'IST' / 'ISTgraph.json') is None
+	assert bd.load_compiled_graph(DATA_DIR / 'indoors' / 'example' / 'example_connections.json') is None
+	assert bd.load_compiled_graph(DATA_DIR / 'indoors' / 'IST' / 'nodes_output.json') is None
+
+
+def test_is_excluded() -> None:
+	assert bd.is_excluded(Path('indoors/example'))
+	assert bd.is_excluded(Path('indoors/ist (example)'))
+	assert bd.is_excluded(Path('indoors/IST/base files'))
+	assert not bd.is_excluded(Path('indoors/IST'))
+	assert not bd.is_excluded(Path('outdoors'))
+
+
+def test_write_asset_skips_variants_that_grow(tmp_path: Path) -> None:
+	small: dict = bd.write_asset(tmp_path, 'metadata/tiny.json', b'{}')
+	large: dict = bd.write_asset(tmp_path, 'metadata/large.json', json.dumps({'a': 'b' * 1000}).encode())
+
+	assert small['encodings'] == []
+	assert 'gz' in large['encodings']
+	assert not (tmp_path / f"{small['file']}.gz").exists()
+	assert gzip.decompress((tmp_path / f"{large['file']}.gz").read_bytes()) == (tmp_path / large['file']).read_bytes()
+
+
+def test_write_asset_without_precompressed(tmp_path: Path) -> None:
+	entry: dict = bd.write_asset(tmp_path, 'metadata/large.json', json.dumps({'a': 'b' * 1000}).encode(), precompressed=False)
+
+	assert entry['encodings'] == []
+	assert [path.name for path in tmp_path.rglob('*') if path.is_file()] == [Path(entry['file']).name]
+
+
+def test_package_bundles_by_map_id(tmp_path: Path) -> None:
+	source: Path = tmp_path / 'data'
+	graph: list[dict] = [{'node_id': 'p1_rm_101_f1', 'connections': {}, 'type': 'rm', 'role': 'destination'}]
+
+	(source / 'metadata').mkdir(parents=True)
+	(source / 'metadata' / 'buildings.json').write_text(json.dumps({'p1': {'name': 'Phase I', 'bld_id': 'p1rh'}}))
+	(source / 'indoors' / 'P1' / 'base files').mkdir(parents=True)
+	(source / 'indoors' / 'P1' / 'p1F1.svg').write_text('<svg/>')
+	(source / 'indoors' / 'P1' / 'P1graph.json').write_text(json.dumps(graph))
+	(source / 'indoors' / 'P1' / 'base files' / 'source.svg').write_text('<svg/>')
+
+	manifest: dict = bd.package(source, tmp_path / 'out', bundles=True)
+	bundle: dict = json.loads((tmp_path / 'out' / manifest['bundles']['p1rh']['file']).read_text())
+
+	assert list(manifest['bundles']) == ['p1rh']
+	assert bundle['bld_id'] == 'p1rh'
+	assert bundle['graph'] == graph
+	assert bundle['floors'] == {'p1F1': '<svg/>'}
+	assert bundle['metadata']['name'] == 'Phase I'
+	assert 'indoors/P1/base files/source.svg' not in manifest['assets']
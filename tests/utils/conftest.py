@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the utility scripts import each other as top-level modules, so make src/utils importable the same way
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src' / 'utils'))
@@ -0,0 +1,95 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from resolve_locations import LocationIndex, build_index, index_fingerprint, load_cache, normalise_location, resolve_events, resolve_location, _split_location
+
+
+@pytest.fixture
+def index(tmp_path: Path) -> LocationIndex:
+	"""Index of the real building metadata and a small IST graph"""
+
+	graph_dir: Path = tmp_path / 'indoors' / 'IST'
+	graph_dir.mkdir(parents=True)
+	(graph_dir / 'ISTgraph.json').write_text(json.dumps([
+		{'node_id': 'ist_rm_1002A_f1', 'connections': {}, 'type': 'rm', 'role': 'destination'},
+		{'node_id': 'ist_hall_e-w_a_1_f1', 'connections': {}, 'type': 'hall', 'role': 'routing'}
+	]))
+
+	return build_index(indoors_dir=tmp_path / 'indoors')
+
+
+def test_normalise_location() -> None:
+	assert normalise_location('Room 1002A, IST Building') == '1002A IST'
+	assert normalise_location('ist-1002a') == 'IST 1002A'
+	assert normalise_location('Phase III') == 'PHASE 3'
+
+
+def test_split_joined_building_and_room(index: LocationIndex) -> None:
+	assert _split_location('IST1002A', index) == ('IST', '1002A', 1)
+	assert _split_location('P11001', index) == ('P1', '1001', 1)
+
+
+def test_split_short_number_is_not_a_room(index: LocationIndex) -> None:
+	assert _split_location('PHASE 3', index) == ('PHASE 3', None, None)
+	assert _split_location('IST 12', index) == ('IST', '12', 1)
+
+
+@pytest.mark.parametrize('location', ['IST 1002A', 'IST1002A', 'Room 1002A, IST Building', 'ist-1002a'])
+def test_resolve_room(index: LocationIndex, location: str) -> None:
+	assert resolve_location(location, index, {}) == ('ist', 'ist_rm_1002A_f1')
+
+
+def test_resolve_numbered_building(index: LocationIndex) -> None:
+	cache: dict[str, str | None] = {}
+
+	assert resolve_location('Phase 3', index, cache) == ('p3rh', None)
+	assert cache == {}
+
+
+def test_resolve_prefers_building_next_to_room(index: LocationIndex) -> None:
+	assert resolve_location('Web Development Club - IST 1002A', index, {}) == ('ist', 'ist_rm_1002A_f1')
+	assert resolve_location('IST 1002A / BARC', index, {}) == ('ist', 'ist_rm_1002A_f1')
+	assert resolve_location('1002A IST, then BARC', index, {}) == ('ist', 'ist_rm_1002A_f1')
+	assert resolve_location('Web Development Club at IST', index, {}) == ('ist', None)
+
+
+def test_resolve_unknown_location(index: LocationIndex) -> None:
+	assert resolve_location('Zoom', index, {}) == (None, None)
+	assert resolve_location('', index, {}) == (None, None)
+
+
+def test_weak_fuzzy_match_is_not_memoised(index: LocationIndex) -> None:
+	cache: dict[str, str | None] = {}
+
+	# "PHASE" is close enough to "PHASE 1" to match but not to be remembered
+	assert resolve_location('Phase', index, cache)[0] in ('p1rh', 'p2rh', 'p3rh')
+	assert 'PHASE' not in cache
+
+
+def test_cache_round_trip(index: LocationIndex, tmp_path: Path) -> None:
+	cache_path: Path = tmp_path / 'cache.json'
+	fingerprint: str = index_fingerprint(index)
+	events: list[dict] = [{'location': 'Barnett Aplied Research Center'}, {'location': 'Zoom'}, {'location': None}]
+
+	resolve_events(events, index, cache_path)
+
+	assert [(event['bld_id'], event['node']) for event in events] == [('barc', None), (None, None), (None, None)]
+	assert load_cache(fingerprint, cache_path) == {'BARNETT APLIED RESEARCH': 'barc', 'ZOOM': None}
+
+	# a memoised match is reused, even one the index alone wouldn't produce
+	cache_path.write_text(json.dumps({'fingerprint': fingerprint, 'matches': {'ZOOM': 'ist'}}))
+
+	assert resolve_events([{'location': 'Zoom'}], index, cache_path)[0]['bld_id'] == 'ist'
+
+
+def test_cache_dropped_when_aliases_change(index: LocationIndex, tmp_path: Path) -> None:
+	cache_path: Path = tmp_path / 'cache.json'
+
+	# a miss memoised while web wasn't in the index
+	without_web: LocationIndex = LocationIndex({alias: bld_id for alias, bld_id in index.buildings.items() if bld_id != 'web'}, index.rooms)
+	assert resolve_events([{'location': 'Wendt Engineering'}], without_web, cache_path)[0]['bld_id'] is None
+
+	assert resolve_events([{'location': 'Wendt Engineering'}], index, cache_path)[0]['bld_id'] == 'web'
+	assert load_cache(index_fingerprint(index), cache_path) == {}